@@ -0,0 +1,18 @@
+"""
+Gunicorn settings for production
+Run from backend/: gunicorn -c gunicorn.conf.py pitch_deck_backend:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# Processes for CPU-bound work (PDF parsing), threads to overlap the long OpenAI waits
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+# Pitch generation with documents can take well over the 30s default
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+keepalive = 5
@@ -0,0 +1,33 @@
+"""
+PDFium page extraction shared by the app and its PDF worker processes
+Kept separate from pitch_deck_backend so worker processes don't import the whole app
+"""
+
+import pypdfium2 as pdfium
+
+
+def pages_text(pdf, start, stop, max_chars):
+    """Extract text for pages [start, stop), stopping early once max_chars is reached"""
+    parts, total = [], 0
+    for index in range(start, stop):
+        if total >= max_chars:
+            break
+        page = pdf[index]
+        textpage = page.get_textpage()
+        if textpage.count_chars():  # Image-only pages have nothing to extract
+            text = textpage.get_text_bounded()
+            parts.append(text)
+            total += len(text)
+        textpage.close()
+        page.close()
+    return parts
+
+
+def page_range(args):
+    """Worker entry point: open the PDF in this process and extract a page range"""
+    file_content, start, stop, max_chars = args
+    pdf = pdfium.PdfDocument(file_content)
+    try:
+        return pages_text(pdf, start, min(stop, len(pdf)), max_chars)
+    finally:
+        pdf.close()
@@ -7,64 +7,322 @@ Now with proper model validation and clear error messages
 import os
 import json
 import logging
-import io
+import queue
+import atexit
 import re
+import codecs
+import multiprocessing
+import hashlib
+import gzip
+import tempfile
+import threading
+import math
+import time
+import functools
+from collections import OrderedDict, deque
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from flask import Flask, request, jsonify, Response
+from types import MappingProxyType
+from flask import Flask, Request, request, jsonify, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 
 # OpenAI
 try:
-    from openai import OpenAI
+    import httpx
+    from openai import OpenAI, AuthenticationError, PermissionDeniedError, NotFoundError
 except ImportError:
     print("ERROR: OpenAI not installed. Run: pip install openai")
     OpenAI = None
+    AuthenticationError = PermissionDeniedError = NotFoundError = None
 
 # File processing
 try:
-    import PyPDF2
+    import pypdfium2 as pdfium  # Native PDFium engine - much faster than pure-Python parsers
+    import pdf_worker
 except ImportError:
-    PyPDF2 = None
+    pdfium = None
+
+try:
+    import pymupdf  # Native MuPDF engine - optional (AGPL), used when PDFium isn't installed
+except ImportError:
+    pymupdf = None
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
 
 try:
     from docx import Document
+    from docx.oxml.ns import qn
 except ImportError:
     Document = None
 
+# Charset detection for non-UTF-8 text uploads (optional)
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+
+# Fast JSON (optional - falls back to the standard library)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Inline CSS/JS minifiers (optional - the page is served unminified without them)
+try:
+    import rcssmin
+    import rjsmin
+except ImportError:
+    rcssmin = rjsmin = None
+
+# Token counting (optional - falls back to ~4 characters per token)
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import brotli  # Optional - smaller page than gzip for browsers that accept br
+except ImportError:
+    brotli = None
+
+try:
+    import h2  # Enables HTTP/2 in httpx (httpx[http2])
+except ImportError:
+    h2 = None
+
+try:
+    import redis  # Optional shared cache tier (REDIS_URL)
+except ImportError:
+    redis = None
+
 # Load environment
 load_dotenv()
 
+# JSON encode/decode helpers - orjson does the work in native code when installed
+if orjson:
+    json_loads = orjson.loads
+    
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+    
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson, so jsonify() skips the pure-Python encoder"""
+        
+        def dumps(self, obj, **kwargs):
+            option = orjson.OPT_SORT_KEYS if kwargs.get('sort_keys', self.sort_keys) else 0
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        
+        def response(self, *args, **kwargs):
+            """jsonify() body straight from orjson's bytes, skipping the str round trip"""
+            obj = self._prepare_response_obj(args, kwargs)
+            option = orjson.OPT_APPEND_NEWLINE | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+            if (self.compact is None and self._app.debug) or self.compact is False:
+                option |= orjson.OPT_INDENT_2
+            return self._app.response_class(orjson.dumps(obj, default=self.default, option=option), mimetype=self.mimetype)
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 # Flask app
 app = Flask(__name__)
+if orjson:
+    app.json = OrjsonProvider(app)
 CORS(app, origins=["*"])
 
-# Logging
-logging.basicConfig(level=logging.INFO)
+# Logging - request threads only enqueue records; a background thread does the I/O
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
 logger = logging.getLogger(__name__)
 
 # Config with validation
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')  # Default to a VALID model
+DEFAULT_OPENAI_MODEL = 'gpt-4o-mini'
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', DEFAULT_OPENAI_MODEL)  # Default to a VALID model
 PORT = int(os.getenv('PORT', 5001))
 
+# Keep-alive pool shared by all OpenAI calls in this process
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', 50))
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 60))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', 5))  # Fail fast on a dead route, not after a full minute
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 60))  # httpx's 5s default drops warm connections between requests
+OPENAI_VERIFY_TIMEOUT = float(os.getenv('OPENAI_VERIFY_TIMEOUT', 2))
+OPENAI_HTTP2 = os.getenv('OPENAI_HTTP2', 'true').lower() in ('1', 'true', 'yes')  # Multiplex concurrent calls over one connection
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', 3))  # 429/5xx are retried with jittered exponential backoff
+
+# Whole-request upload cap; larger uploads are rejected with 413 before any parsing
+MAX_UPLOAD_MB = int(os.getenv('MAX_UPLOAD_MB', 10))
+MAX_UPLOAD_FILES = int(os.getenv('MAX_UPLOAD_FILES', 5))
+MAX_FILE_MB = int(os.getenv('MAX_FILE_MB', 5))
+UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_MB', 4)) * 1024 * 1024  # Each upload stays in memory up to this size
+
+# Per-client limit on pitch generation, so one burst can't use up the OpenAI quota for everyone
+PITCH_RATE_LIMIT = os.getenv('PITCH_RATE_LIMIT', '10 per minute')
+PROXY_COUNT = int(os.getenv('PROXY_COUNT', 1))  # Render's load balancer sits in front of the app
+# In-flight OpenAI calls per worker process (half of GUNICORN_THREADS, 16 by default). Requests waiting for a
+# slot still hold their gunicorn thread; the cap only keeps a burst off the HTTP connection pool and the
+# upstream rate limit. Every worker has its own cap, so the server-wide limit is workers x this value.
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', max(1, int(os.getenv('GUNICORN_THREADS', 16)) // 2)))
+
+# Extracted-text cache (keyed by content hash, survives restarts)
+EXTRACT_CACHE_DIR = os.getenv('EXTRACT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pitchdeck_extract_cache'))
+EXTRACT_CACHE_TTL = int(os.getenv('EXTRACT_CACHE_TTL', 7 * 24 * 3600))  # Seconds; Redis expires keys, disk is swept
+CACHE_SWEEP_INTERVAL = 600  # Seconds between scans of a disk cache directory for expired files
+CACHE_DIR_MAX_BYTES = int(os.getenv('CACHE_DIR_MAX_MB', 512)) * 1024 * 1024  # Per cache directory; oldest files go first
+MAX_EXTRACT_CHARS = 5000
+
+# Finished pitches cached by prompt hash; optional near-duplicate lookup via embeddings
+PITCH_CACHE_DIR = os.getenv('PITCH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'pitchdeck_pitch_cache'))
+PITCH_CACHE_TTL = int(os.getenv('PITCH_CACHE_TTL', 3600))  # Seconds
+REDIS_URL = os.getenv('REDIS_URL')  # When set, caches are shared across workers/instances instead of per-machine disk
+REDIS_TIMEOUT = float(os.getenv('REDIS_TIMEOUT', 0.5))
+# Rate-limit counters live in Redis when it's available; memory:// keeps a separate count in every
+# worker process, so the effective limit is then PITCH_RATE_LIMIT per client per worker
+RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', REDIS_URL if REDIS_URL and redis else 'memory://')
+SEMANTIC_CACHE = os.getenv('SEMANTIC_CACHE', '').lower() in ('1', 'true', 'yes')
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92))
+SEMANTIC_CACHE_SIZE = 256
+EMBEDDING_MODEL = 'text-embedding-3-small'
+
+# PDF pages are extracted across worker processes for longer documents
+MAX_PDF_PAGES = 20
+# Per gunicorn worker process - with 2*cpu+1 of those, a per-core default would oversubscribe the host many times over
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', min(2, os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = 5  # Below this, process start-up costs more than it saves
+MAX_EXTRACT_THREADS = 8  # Uploaded files are extracted concurrently
+
+# Typical raise per funding stage (read-only)
+FUNDING_AMOUNTS = MappingProxyType({
+    "pre-seed": "$500K-1M",
+    "seed": "$2-3M",
+    "series-a": "$10-15M",
+    "series-b": "$30-50M"
+})
+DEFAULT_FUNDING_AMOUNT = "$5M"
+
+# Document text sent to the model, budgeted in tokens rather than characters
+PITCH_CONTEXT_TOKENS = 1500
+
+# Output cap for the pitch: the three sections target ~1,050 words (~1,400 tokens) plus JSON keys.
+# Reasoning models count their hidden reasoning against the same cap, so they keep more headroom.
+PITCH_MAX_TOKENS = int(os.getenv('PITCH_MAX_TOKENS', 1800))
+REASONING_MAX_TOKENS = int(os.getenv('REASONING_MAX_TOKENS', 3000))
+
+# What each model accepts, resolved once here so request building never branches on model names.
+# reasoning: hidden reasoning tokens and default temperature only; structured_output: strict JSON schema;
+# json_mode: response_format json_object (the 0613-era gpt-4 / gpt-3.5-turbo-16k reject it)
+_REASONING_CAPS = MappingProxyType({"reasoning": True, "structured_output": True, "json_mode": True})
+_STRUCTURED_CAPS = MappingProxyType({"reasoning": False, "structured_output": True, "json_mode": True})
+_JSON_MODE_CAPS = MappingProxyType({"reasoning": False, "structured_output": False, "json_mode": True})
+_LEGACY_CAPS = MappingProxyType({"reasoning": False, "structured_output": False, "json_mode": False})
+
 # Valid OpenAI models (including GPT-5 as of Aug 2025!)
-VALID_MODELS = [
-    'gpt-5', 'gpt-5-mini', 'gpt-5-nano',  # New GPT-5 models!
-    'gpt-5-2025-08-07',  # Date-versioned GPT-5
-    'gpt-4o', 'gpt-4o-mini', 'gpt-4-turbo', 'gpt-4', 
-    'gpt-3.5-turbo', 'gpt-3.5-turbo-16k'
-]
+MODEL_CAPS = MappingProxyType({
+    'gpt-5': _REASONING_CAPS, 'gpt-5-mini': _REASONING_CAPS, 'gpt-5-nano': _REASONING_CAPS,  # New GPT-5 models!
+    'gpt-5-2025-08-07': _REASONING_CAPS,  # Date-versioned GPT-5
+    'gpt-4o': _STRUCTURED_CAPS, 'gpt-4o-mini': _STRUCTURED_CAPS,
+    'gpt-4-turbo': _JSON_MODE_CAPS, 'gpt-4': _LEGACY_CAPS,
+    'gpt-3.5-turbo': _JSON_MODE_CAPS, 'gpt-3.5-turbo-16k': _LEGACY_CAPS
+})
+VALID_MODELS = tuple(MODEL_CAPS)
 
 # Validate model
 if OPENAI_MODEL not in VALID_MODELS:
     logger.error(f"❌ Invalid model '{OPENAI_MODEL}'. Valid models: {', '.join(VALID_MODELS)}")
-    logger.warning(f"⚠️ Defaulting to 'gpt-4o-mini'")
-    OPENAI_MODEL = 'gpt-4o-mini'
+    logger.warning(f"⚠️ Defaulting to '{DEFAULT_OPENAI_MODEL}'")
+    OPENAI_MODEL = DEFAULT_OPENAI_MODEL
+
+# Same inputs -> same pitch: temperature 0 where the model allows it, plus a seed derived from the prompt
+DETERMINISTIC_PITCHES = os.getenv('DETERMINISTIC_PITCHES', '').lower() in ('1', 'true', 'yes')
+
+# Larger model for documents that overflow the default model's context budget, and a second try when the
+# default model's answer is unusable. Only the cheap default escalates; an operator-chosen OPENAI_MODEL is kept.
+OPENAI_ESCALATION_MODEL = os.getenv('OPENAI_ESCALATION_MODEL', 'gpt-4o')  # Empty disables escalation
+ESCALATION_CONTEXT_TOKENS = int(os.getenv('ESCALATION_CONTEXT_TOKENS', 4000))  # Document budget for the escalated model
+
+if OPENAI_ESCALATION_MODEL and OPENAI_ESCALATION_MODEL not in VALID_MODELS:
+    logger.error(f"❌ Invalid escalation model '{OPENAI_ESCALATION_MODEL}' - escalation disabled")
+    OPENAI_ESCALATION_MODEL = ''
+if OPENAI_MODEL != DEFAULT_OPENAI_MODEL or OPENAI_ESCALATION_MODEL == OPENAI_MODEL:
+    OPENAI_ESCALATION_MODEL = ''
 
 # Initialize OpenAI with better error handling
 ai_client = None
 ai_status = "Not configured"
+ai_verified = None  # None until the first key/model check completes
+_ai_verify_lock = threading.Lock()
+_ai_warmup_lock = threading.Lock()  # Held while a warm-up call is in flight
+_last_ai_contact = 0.0  # time.monotonic() of the last OpenAI response; the pooled connection outlives it by the keep-alive expiry
+
+def verify_ai():
+    """Check the API key and model once with a cheap models.retrieve call (memoized)"""
+    global ai_verified, ai_status
+    if ai_verified is not None or not ai_client:
+        return bool(ai_verified)
+    with _ai_verify_lock:
+        if ai_verified is None:
+            try:
+                # Short timeout and no retries: /health waits on this
+                ai_client.with_options(timeout=OPENAI_VERIFY_TIMEOUT, max_retries=0).models.retrieve(OPENAI_MODEL)
+                ai_status = f"Connected (using {OPENAI_MODEL})"
+                logger.info(f"✅ OpenAI initialized successfully with model: {OPENAI_MODEL}")
+                ai_verified = True
+                _mark_ai_contact()
+            except (AuthenticationError, PermissionDeniedError, NotFoundError) as e:
+                # Bad key or unknown model - retrying won't help
+                ai_status = f"Failed: {str(e)}"
+                logger.error(f"❌ OpenAI initialization failed: {e}")
+                logger.error(f"   Check your API key and model name ({OPENAI_MODEL})")
+                ai_verified = False
+            except Exception as e:
+                # Network trouble, rate limits and 5xx say nothing about the key - check again next time
+                ai_status = f"Unreachable: {str(e)}"
+                logger.warning(f"⚠️ OpenAI not reachable yet: {e}")
+    return bool(ai_verified)
+
+def _mark_ai_contact():
+    """Record that a pooled OpenAI connection was just used"""
+    global _last_ai_contact
+    _last_ai_contact = time.monotonic()
+
+def warm_ai_connection():
+    """Make a cheap API call so a pooled keep-alive connection is ready for the next completion"""
+    try:
+        if ai_verified is None:
+            verify_ai()
+            return
+        # Best effort: short timeout and no retries, the completion will connect on its own anyway
+        ai_client.with_options(timeout=OPENAI_VERIFY_TIMEOUT, max_retries=0).models.retrieve(OPENAI_MODEL)
+        _mark_ai_contact()
+    except Exception as e:
+        logger.warning(f"OpenAI connection warm-up failed: {e}")
+    finally:
+        _ai_warmup_lock.release()
+
+def start_ai_warmup():
+    """Warm the OpenAI connection in the background, unless one is still alive or already warming"""
+    if not ai_client or time.monotonic() - _last_ai_contact < OPENAI_KEEPALIVE_EXPIRY:
+        return
+    if _ai_warmup_lock.acquire(blocking=False):
+        threading.Thread(target=warm_ai_connection, daemon=True).start()
 
 if not OPENAI_API_KEY:
     ai_status = "Missing API key - set OPENAI_API_KEY in environment"
@@ -73,630 +331,165 @@ elif not OpenAI:
     ai_status = "OpenAI library not installed"
     logger.error(f"❌ {ai_status}")
 else:
-    try:
-        ai_client = OpenAI(api_key=OPENAI_API_KEY)
-        # Test with the ACTUAL model we'll use
-        test_response = ai_client.chat.completions.create(
-            model=OPENAI_MODEL,  # Use the actual model
-            messages=[{"role": "user", "content": "test"}],
-            max_completion_tokens=5  # Use correct parameter name for GPT-5
-        )
-        ai_status = f"Connected (using {OPENAI_MODEL})"
-        logger.info(f"✅ OpenAI initialized successfully with model: {OPENAI_MODEL}")
-    except Exception as e:
-        ai_status = f"Failed: {str(e)}"
-        logger.error(f"❌ OpenAI initialization failed: {e}")
-        logger.error(f"   Check your API key and model name ({OPENAI_MODEL})")
-        ai_client = None
-
-# Main HTML page (keeping your original UI)
-HTML_PAGE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>AI Sales Pitch Generator</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Arial, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            overflow: hidden;
-        }
-        
-        .header {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }
-        
-        .header h1 {
-            font-size: 2.5rem;
-            margin-bottom: 10px;
-        }
-        
-        .ai-status {
-            background: rgba(255,255,255,0.2);
-            padding: 10px 20px;
-            border-radius: 20px;
-            display: inline-block;
-            margin-top: 10px;
-            font-size: 0.9rem;
-        }
-        
-        .ai-status.connected {
-            background: rgba(76, 175, 80, 0.3);
-        }
-        
-        .ai-status.error {
-            background: rgba(244, 67, 54, 0.3);
-        }
-        
-        .content {
-            display: grid;
-            grid-template-columns: 500px 1fr;
-            gap: 40px;
-            padding: 40px;
-        }
-        
-        .input-section {
-            background: #f8f9fa;
-            padding: 30px;
-            border-radius: 15px;
-        }
-        
-        .form-group {
-            margin-bottom: 20px;
-        }
-        
-        label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #333;
-        }
-        
-        input, textarea, select {
-            width: 100%;
-            padding: 12px;
-            border: 2px solid #e0e0e0;
-            border-radius: 8px;
-            font-size: 1rem;
-            font-family: inherit;
-        }
-        
-        input:focus, textarea:focus, select:focus {
-            outline: none;
-            border-color: #667eea;
-        }
-        
-        textarea {
-            min-height: 100px;
-            resize: vertical;
-        }
-        
-        .file-upload-box {
-            border: 3px dashed #667eea;
-            border-radius: 10px;
-            padding: 40px;
-            text-align: center;
-            cursor: pointer;
-            transition: all 0.3s;
-            background: white;
-            margin-bottom: 20px;
-        }
-        
-        .file-upload-box:hover {
-            background: #f0f4ff;
-        }
-        
-        .file-upload-box.drag-over {
-            background: #e8ecff;
-            border-color: #4c63d2;
-        }
-        
-        .file-icon {
-            font-size: 3rem;
-            margin-bottom: 10px;
-        }
-        
-        .file-list {
-            margin: 20px 0;
-        }
-        
-        .file-item {
-            background: white;
-            padding: 10px;
-            border-radius: 5px;
-            margin-bottom: 10px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }
-        
-        .remove-btn {
-            background: #ff4444;
-            color: white;
-            border: none;
-            padding: 5px 10px;
-            border-radius: 5px;
-            cursor: pointer;
-        }
-        
-        .btn {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            padding: 15px 30px;
-            border-radius: 8px;
-            font-size: 1.1rem;
-            font-weight: 600;
-            cursor: pointer;
-            width: 100%;
-            transition: transform 0.3s;
-        }
-        
-        .btn:hover {
-            transform: translateY(-2px);
-        }
-        
-        .btn:disabled {
-            opacity: 0.5;
-            cursor: not-allowed;
-        }
-        
-        .output-section {
-            background: white;
-        }
-        
-        .output-content {
-            padding: 30px;
-            background: white;
-            border: 2px solid #e0e0e0;
-            border-radius: 10px;
-            min-height: 500px;
-            max-height: 700px;
-            overflow-y: auto;
-        }
-        
-        .output-content h2 {
-            color: #667eea;
-            margin: 30px 0 20px 0;
-            padding-bottom: 10px;
-            border-bottom: 2px solid #667eea;
-        }
-        
-        .output-content p {
-            line-height: 1.8;
-            margin-bottom: 15px;
-            color: #444;
-        }
-        
-        .loading {
-            text-align: center;
-            padding: 50px;
-        }
-        
-        .spinner {
-            border: 4px solid #f3f3f3;
-            border-top: 4px solid #667eea;
-            border-radius: 50%;
-            width: 50px;
-            height: 50px;
-            animation: spin 1s linear infinite;
-            margin: 20px auto;
-        }
-        
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-        
-        .placeholder {
-            text-align: center;
-            padding: 100px 20px;
-            color: #999;
-        }
-        
-        .error-message {
-            background: #ffebee;
-            color: #c62828;
-            padding: 15px;
-            border-radius: 8px;
-            margin-bottom: 20px;
-        }
-        
-        @media (max-width: 1024px) {
-            .content {
-                grid-template-columns: 1fr;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🚀 AI Sales Pitch Generator</h1>
-            <p>Create professional 2-3 page investor pitches</p>
-            <div class="ai-status" id="aiStatus">
-                Checking AI connection...
-            </div>
-        </div>
-        
-        <div class="content">
-            <div class="input-section">
-                <h2 style="margin-bottom: 25px;">Your Information</h2>
-                
-                <!-- File Upload -->
-                <div id="dropZone" class="file-upload-box">
-                    <div class="file-icon">📁</div>
-                    <div>Drag files here or click to browse</div>
-                    <small>PDF, Word, or text files</small>
-                </div>
-                <input type="file" id="fileInput" multiple accept=".pdf,.txt,.doc,.docx" style="display: none;">
-                
-                <div id="fileList" class="file-list"></div>
-                
-                <!-- Form -->
-                <div class="form-group">
-                    <label>Company Name *</label>
-                    <input type="text" id="companyName" placeholder="TechVentures Inc.">
-                </div>
-                
-                <div class="form-group">
-                    <label>Industry *</label>
-                    <input type="text" id="industry" placeholder="B2B SaaS, Fintech, etc.">
-                </div>
-                
-                <div class="form-group">
-                    <label>Problem You Solve *</label>
-                    <textarea id="problem" placeholder="What problem does your company solve?"></textarea>
-                </div>
-                
-                <div class="form-group">
-                    <label>Your Solution *</label>
-                    <textarea id="solution" placeholder="How do you solve this problem?"></textarea>
-                </div>
-                
-                <div class="form-group">
-                    <label>Funding Stage</label>
-                    <select id="fundingStage">
-                        <option value="seed">Seed</option>
-                        <option value="series-a">Series A</option>
-                        <option value="series-b">Series B</option>
-                    </select>
-                </div>
-                
-                <div class="form-group">
-                    <label>Traction (Optional)</label>
-                    <input type="text" id="traction" placeholder="100 customers, $1M ARR, etc.">
-                </div>
-                
-                <button id="generateBtn" class="btn" onclick="generatePitch()">
-                    Generate Sales Pitch
-                </button>
-            </div>
-            
-            <div class="output-section">
-                <h2 style="margin-bottom: 20px;">Generated Pitch</h2>
-                <div class="output-content" id="output">
-                    <div class="placeholder">
-                        <h3>Your pitch will appear here</h3>
-                        <p>Fill in the form and click Generate</p>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <script>
-        // Global variables
-        let uploadedFiles = [];
-        
-        // Check AI status on load
-        fetch('/health')
-            .then(res => res.json())
-            .then(data => {
-                const statusEl = document.getElementById('aiStatus');
-                if (data.ai_available) {
-                    statusEl.className = 'ai-status connected';
-                    statusEl.textContent = '✅ AI Connected';
-                } else {
-                    statusEl.className = 'ai-status error';
-                    statusEl.textContent = '⚠️ AI Not Available (using fallback)';
-                }
-            })
-            .catch(() => {
-                document.getElementById('aiStatus').textContent = '❌ Server Error';
-            });
-        
-        // Get elements
-        const dropZone = document.getElementById('dropZone');
-        const fileInput = document.getElementById('fileInput');
-        const fileList = document.getElementById('fileList');
-        
-        // Click to upload
-        dropZone.addEventListener('click', () => {
-            fileInput.click();
-        });
-        
-        // File input change
-        fileInput.addEventListener('change', (e) => {
-            handleFiles(e.target.files);
-        });
-        
-        // Drag and drop
-        dropZone.addEventListener('dragover', (e) => {
-            e.preventDefault();
-            e.stopPropagation();
-            dropZone.classList.add('drag-over');
-        });
-        
-        dropZone.addEventListener('dragleave', (e) => {
-            e.preventDefault();
-            e.stopPropagation();
-            dropZone.classList.remove('drag-over');
-        });
-        
-        dropZone.addEventListener('drop', (e) => {
-            e.preventDefault();
-            e.stopPropagation();
-            dropZone.classList.remove('drag-over');
-            
-            const files = e.dataTransfer.files;
-            handleFiles(files);
-        });
-        
-        // Prevent default drag behavior on document
-        document.addEventListener('dragover', (e) => {
-            e.preventDefault();
-        });
-        
-        document.addEventListener('drop', (e) => {
-            e.preventDefault();
-        });
-        
-        // Handle files
-        function handleFiles(files) {
-            for (let file of files) {
-                uploadedFiles.push(file);
-            }
-            updateFileList();
-        }
-        
-        // Update file list display
-        function updateFileList() {
-            if (uploadedFiles.length === 0) {
-                fileList.innerHTML = '';
-                return;
-            }
-            
-            fileList.innerHTML = uploadedFiles.map((file, idx) => `
-                <div class="file-item">
-                    <span>📄 ${file.name}</span>
-                    <button class="remove-btn" onclick="removeFile(${idx})">Remove</button>
-                </div>
-            `).join('');
-        }
-        
-        // Remove file
-        function removeFile(index) {
-            uploadedFiles.splice(index, 1);
-            updateFileList();
-        }
-        
-        // Generate pitch
-        async function generatePitch() {
-            const companyName = document.getElementById('companyName').value;
-            const industry = document.getElementById('industry').value;
-            const problem = document.getElementById('problem').value;
-            const solution = document.getElementById('solution').value;
-            const fundingStage = document.getElementById('fundingStage').value;
-            const traction = document.getElementById('traction').value;
-            
-            if (!companyName || !industry || !problem || !solution) {
-                alert('Please fill in all required fields');
-                return;
-            }
-            
-            const btn = document.getElementById('generateBtn');
-            const output = document.getElementById('output');
-            
-            btn.disabled = true;
-            btn.textContent = 'Generating...';
-            
-            output.innerHTML = '<div class="loading"><div class="spinner"></div><p>Creating your pitch...</p></div>';
-            
-            // Prepare form data
-            const formData = new FormData();
-            formData.append('company_name', companyName);
-            formData.append('industry', industry);
-            formData.append('problem', problem);
-            formData.append('solution', solution);
-            formData.append('funding_stage', fundingStage);
-            formData.append('traction', traction);
-            
-            // Add files if any
-            uploadedFiles.forEach(file => {
-                formData.append('files', file);
-            });
-            
-            try {
-                const response = await fetch('/api/generate', {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                const data = await response.json();
-                
-                if (data.error) {
-                    output.innerHTML = `
-                        <div class="error-message">
-                            <strong>Error:</strong> ${data.error}
-                            ${data.details ? `<br><small>${data.details}</small>` : ''}
-                        </div>
-                    `;
-                } else {
-                    displayPitch(data);
-                }
-            } catch (error) {
-                output.innerHTML = '<div class="error-message">Error connecting to server</div>';
-            }
-            
-            btn.disabled = false;
-            btn.textContent = 'Generate Sales Pitch';
-        }
-        
-        // Display pitch
-        function displayPitch(data) {
-            const output = document.getElementById('output');
-            
-            let html = '<h1>' + (data.company_name || 'Sales Pitch') + '</h1>';
-            
-            if (data.generation_method) {
-                html += `<p style="color: #667eea; font-size: 0.9rem;">Generated via: ${data.generation_method}</p>`;
-            }
-            
-            if (data.executive_summary) {
-                html += '<h2>Executive Summary</h2>';
-                html += '<p>' + data.executive_summary + '</p>';
-            }
-            
-            if (data.opportunity) {
-                html += '<h2>The Opportunity</h2>';
-                html += '<p>' + data.opportunity + '</p>';
-            }
-            
-            if (data.why_us) {
-                html += '<h2>Why ' + (data.company_name || 'Us') + '</h2>';
-                html += '<p>' + data.why_us + '</p>';
-            }
-            
-            output.innerHTML = html;
-        }
-    </script>
-</body>
-</html>
-"""
+    # Sized pool so concurrent requests reuse warm TLS connections instead of re-handshaking
+    http_client = httpx.Client(
+        http2=OPENAI_HTTP2 and h2 is not None,
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+    )
+    ai_client = OpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=OPENAI_MAX_RETRIES)
+    ai_status = f"Checking connection (using {OPENAI_MODEL})"
+    
+    # Validate in the background so boot never waits on a network round-trip
+    threading.Thread(target=verify_ai, daemon=True).start()
+
+# Bounds in-flight completions in this process; callers block (holding their thread) until a slot frees up
+_openai_slots = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+
+def chat_completion(**kwargs):
+    """Run a chat completion once a concurrency slot is free"""
+    with _openai_slots:
+        response = ai_client.chat.completions.create(**kwargs)
+    _mark_ai_contact()
+    return response
+
+def chat_completion_stream(**kwargs):
+    """Yield streamed completion chunks, holding a concurrency slot until the stream ends or is closed"""
+    with _openai_slots:
+        stream = ai_client.chat.completions.create(stream=True, **kwargs)
+        try:
+            yield from stream
+        finally:
+            stream.close()
+            _mark_ai_contact()
+
+# Main HTML page (keeping your original UI) - lives in static/index.html, loaded once at import
+HTML_PAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'index.html')
+with open(HTML_PAGE_PATH, encoding='utf-8') as f:
+    HTML_PAGE = f.read()
+
+# The page never changes at runtime: encode, compress and fingerprint it once
+_STYLE_RE = re.compile(r'(<style>)(.*?)(</style>)', re.S)
+_SCRIPT_RE = re.compile(r'(<script>)(.*?)(</script>)', re.S)
+
+# Comments and whitespace-only gaps between tags, skipping blocks where whitespace is content or code
+_MARKUP_SLACK_RE = re.compile(r'(<(script|style|pre|textarea)\b.*?</\2>)|(<!--.*?-->\s*)|>\s+(?=<)', re.S)
+
+def _trim_markup(match):
+    if match.group(1):
+        return match.group(1)
+    if match.group(3):
+        return ''
+    return '> '  # One space renders the same as the original run of newlines and indentation
+
+def _minify_html(html):
+    """Drop comments, collapse whitespace between tags and minify the inline <style> and <script> blocks"""
+    html = _MARKUP_SLACK_RE.sub(_trim_markup, html.strip())
+    if not (rcssmin and rjsmin):
+        return html
+    html = _STYLE_RE.sub(lambda m: m.group(1) + rcssmin.cssmin(m.group(2)) + m.group(3), html)
+    return _SCRIPT_RE.sub(lambda m: m.group(1) + rjsmin.jsmin(m.group(2)) + m.group(3), html)
+
+_HTML_BYTES = _minify_html(HTML_PAGE).encode('utf-8')
+_HTML_GZIP = gzip.compress(_HTML_BYTES, compresslevel=9)
+_HTML_BROTLI = brotli.compress(_HTML_BYTES, quality=11, mode=brotli.MODE_TEXT) if brotli else None
+_HTML_ETAG = hashlib.sha256(_HTML_BYTES).hexdigest()[:32]
+HTML_MAX_AGE = 3600
+
+# JSON bodies smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 500
+
+def gzip_response(response):
+    """Gzip a response body in place when the client accepts it and it's large enough to matter"""
+    response.vary.add('Accept-Encoding')
+    if 'gzip' in request.accept_encodings and response.content_length and response.content_length >= GZIP_MIN_BYTES:
+        response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+# Rate limits are keyed by client IP, taken from X-Forwarded-For when behind a proxy
+if PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_COUNT)
+limiter = Limiter(get_remote_address, app=app, storage_uri=RATELIMIT_STORAGE_URI,
+                  in_memory_fallback_enabled=True)  # Keep limiting per process while Redis is down
+
+# Oversized requests are stopped while they're read
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
+
+class UploadRequest(Request):
+    """Request whose uploads stay in memory up to UPLOAD_SPOOL_BYTES (Werkzeug spools anything over 500KB to disk)"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode='rb+')
+
+app.request_class = UploadRequest
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    return jsonify({
+        "error": f"Upload too large - up to {MAX_UPLOAD_FILES} files, {MAX_FILE_MB}MB each and {MAX_UPLOAD_MB}MB in total",
+        "details": e.description if app.debug else None
+    }), 413
+
+@app.errorhandler(429)
+def rate_limited(e):
+    return jsonify({"error": "Too many requests - please wait a minute and try again", "details": e.description}), 429
 
 @app.route('/')
 def index():
-    """Serve the main page"""
-    return Response(HTML_PAGE, mimetype='text/html')
+    """Serve the main page (Brotli or gzip when accepted, 304 when the browser copy is current)"""
+    if request.if_none_match.contains(_HTML_ETAG):
+        response = Response(status=304)
+    elif _HTML_BROTLI and 'br' in request.accept_encodings:
+        response = Response(_HTML_BROTLI, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in request.accept_encodings:
+        response = Response(_HTML_GZIP, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(_HTML_BYTES, mimetype='text/html')
+    
+    response.set_etag(_HTML_ETAG)
+    response.headers['Cache-Control'] = f'public, max-age={HTML_MAX_AGE}'
+    response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/health')
 def health():
     """Health check with detailed status"""
+    ai_available = verify_ai()
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "ai_available": ai_client is not None,
+        "ai_available": ai_available,
         "ai_status": ai_status,
-        "model": OPENAI_MODEL if ai_client else None
+        "model": OPENAI_MODEL if ai_available else None,
+        "cache": {
+            "pitch": _pitch_cache.stats(),
+            "extraction": _extract_cache.stats()
+        }
     })
 
 @app.route('/api/generate', methods=['POST'])
+@limiter.limit(PITCH_RATE_LIMIT)
 def generate_pitch():
     """Generate sales pitch with optional file context"""
     try:
-        # Get form data
-        company_name = request.form.get('company_name')
-        industry = request.form.get('industry')
-        problem = request.form.get('problem')
-        solution = request.form.get('solution')
-        funding_stage = request.form.get('funding_stage', 'seed')
-        traction = request.form.get('traction', '')
-        
-        # Validate
-        if not all([company_name, industry, problem, solution]):
+        inputs = collect_pitch_inputs()
+        if inputs is None:
             return jsonify({"error": "Missing required fields"}), 400
         
-        # Process uploaded files if any
-        additional_context = ""
-        extracted_data = None
-        
-        if 'files' in request.files:
-            files = request.files.getlist('files')
-            logger.info(f"Processing {len(files)} uploaded files")
-            
-            for file in files:
-                if file and file.filename:
-                    logger.info(f"Extracting content from: {file.filename}")
-                    content = extract_file_content(file)
-                    if content:
-                        additional_context += f"\n\n--- Content from {file.filename} ---\n{content}\n"
-        
-        # Extract structured data from files if AI is available
-        if additional_context and ai_client:
-            logger.info(f"Extracting structured data from {len(additional_context)} chars")
-            try:
-                extraction_prompt = f"""
-                Extract key business information from these documents:
-                
-                {additional_context[:4000]}
-                
-                Extract and return as JSON:
-                - company_description: Detailed description of what the company does
-                - revenue_metrics: Any revenue, ARR, MRR, growth rates mentioned
-                - team_details: Information about founders and team
-                - product_features: Key product features and capabilities
-                - market_size: TAM, SAM, SOM if mentioned
-                - competitors: Any competitors mentioned
-                - achievements: Awards, partnerships, milestones
-                - financial_projections: Future revenue/growth projections
-                - use_of_funds: How they plan to use investment
-                - key_metrics: Other important metrics (users, NPS, etc.)
-                
-                If not found, leave empty. Be thorough.
-                """
-                
-                extraction_response = ai_client.chat.completions.create(
-                    model=OPENAI_MODEL,
-                    messages=[
-                        {"role": "system", "content": "Extract specific business data from documents."},
-                        {"role": "user", "content": extraction_prompt}
-                    ],
-                    temperature=1,  # GPT-5 only supports default temperature
-                    response_format={"type": "json_object"}
-                )
-                
-                extracted_data = json.loads(extraction_response.choices[0].message.content)
-                logger.info(f"Successfully extracted structured data from files")
-                
-            except Exception as e:
-                logger.error(f"Failed to extract data from files: {e}")
-        
         # Generate the pitch
-        pitch = generate_pitch_content(
-            company_name,
-            industry,
-            problem,
-            solution,
-            funding_stage,
-            traction,
-            additional_context,
-            extracted_data
-        )
+        pitch = generate_pitch_content(**inputs)
         
-        return jsonify(pitch)
+        return gzip_response(jsonify(pitch))
         
+    except HTTPException:
+        raise  # e.g. 413 from the upload cap - handled by its error handler
     except Exception as e:
         logger.error(f"Error in /api/generate: {e}")
         return jsonify({
@@ -704,135 +497,817 @@ def generate_pitch():
             "details": str(e) if app.debug else None
         }), 500
 
-def extract_file_content(file):
-    """Extract text from uploaded file"""
+@app.route('/api/generate/stream', methods=['POST'])
+@limiter.limit(PITCH_RATE_LIMIT)
+def generate_pitch_stream():
+    """Generate sales pitch as Server-Sent Events, emitting each section as soon as it is written"""
     try:
-        filename = file.filename.lower()
-        file_content = file.read()
+        inputs = collect_pitch_inputs()
+        if inputs is None:
+            return jsonify({"error": "Missing required fields"}), 400
         
-        if filename.endswith('.pdf') and PyPDF2:
-            pdf = PyPDF2.PdfReader(io.BytesIO(file_content))
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-            return text[:5000]
-            
-        elif filename.endswith('.txt'):
-            return file_content.decode('utf-8', errors='ignore')[:5000]
+        response = Response(stream_with_context(stream_pitch_content(**inputs)), mimetype='text/event-stream')
+        # Keep proxies from caching or buffering the stream into one late response
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in /api/generate/stream: {e}")
+        return jsonify({
+            "error": "Failed to generate pitch",
+            "details": str(e) if app.debug else None
+        }), 500
+
+def _upload_size(stream):
+    """Size of an uploaded file in bytes (multipart parts rarely carry their own Content-Length)"""
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return size
+
+def collect_pitch_inputs():
+    """Read form fields and uploaded files into generate_pitch_content arguments (None if invalid)"""
+    # Get form data (whitespace-only counts as missing)
+    company_name = request.form.get('company_name', '').strip()
+    industry = request.form.get('industry', '').strip()
+    problem = request.form.get('problem', '').strip()
+    solution = request.form.get('solution', '').strip()
+    funding_stage = request.form.get('funding_stage', 'seed')
+    traction = request.form.get('traction', '').strip()
+    
+    # Validate before any upload is parsed or the model is called
+    if not all([company_name, industry, problem, solution]):
+        return None
+    
+    # Process uploaded files if any
+    context_parts = []
+    
+    if 'files' in request.files:
+        files = request.files.getlist('files')
+        logger.info(f"Processing {len(files)} uploaded files")
+        if len(files) > MAX_UPLOAD_FILES:
+            raise RequestEntityTooLarge(f"{len(files)} files uploaded, limit is {MAX_UPLOAD_FILES}")
+        for file in files:
+            if _upload_size(file.stream) > MAX_FILE_MB * 1024 * 1024:
+                raise RequestEntityTooLarge(f"{file.filename} is over {MAX_FILE_MB}MB")
+        
+        # Each worker gets its own upload stream; nothing is shared between threads
+        uploads = [(file.filename, file.stream) for file in files if file and file.filename]
+        if uploads:
+            if len(uploads) == 1:
+                contents = [extract_file_content(*uploads[0])]
+            else:
+                contents = list(_extract_pool.map(lambda upload: extract_file_content(*upload), uploads))
             
-        elif filename.endswith(('.doc', '.docx')) and Document:
-            doc = Document(io.BytesIO(file_content))
-            text = "\n".join([p.text for p in doc.paragraphs])
-            return text[:5000]
+            for (filename, _), content in zip(uploads, contents):
+                if content:
+                    context_parts.append(f"\n\n--- Content from {filename} ---\n{content}\n")
+    
+    return {
+        "company_name": company_name,
+        "industry": industry,
+        "problem": problem,
+        "solution": solution,
+        "funding_stage": funding_stage,
+        "traction": traction,
+        "context": "".join(context_parts)
+    }
+
+class TextCache:
+    """String cache keyed by content hash: in-process LRU backed by Redis, or one file per key on disk"""
+    
+    def __init__(self, directory, memo_size=128, ttl=None, redis_client=None, prefix="", max_bytes=CACHE_DIR_MAX_BYTES):
+        self.directory = directory
+        self.memo_size = memo_size
+        self.ttl = ttl  # Seconds an entry stays valid; None keeps entries forever
+        self.max_bytes = max_bytes  # Disk tier size cap, enforced by the periodic sweep
+        self.redis = redis_client
+        self.prefix = prefix  # Redis key namespace
+        self.hits = 0
+        self.misses = 0
+        self._memo = OrderedDict()  # key -> (text, stored_at)
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0  # First disk write sweeps leftovers from earlier runs
+        self._written = 0  # Bytes written since the last sweep
+    
+    def get(self, key):
+        """Look up cached text (memory first, then Redis or disk); None on miss or expiry"""
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        text, stored_at = self._read_redis(key) if self.redis is not None else self._read_disk(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._remember(key, text, stored_at)
+        return text
+    
+    def put(self, key, text):
+        """Store text in memory and in Redis or on disk"""
+        self._remember(key, text, time.time())
+        if self.redis is not None:
+            self._write_redis(key, text)
+        else:
+            self._write_disk(key, text)
+            self._maybe_sweep(len(text))
+    
+    def _read_disk(self, key):
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, encoding='utf-8', newline='') as f:
+                stored_at = os.fstat(f.fileno()).st_mtime
+                if not self._expired(stored_at):
+                    return f.read(), stored_at
+            os.remove(path)  # Expired - reclaim the space
+        except OSError:
+            pass
+        return None, None
+    
+    def _write_disk(self, key, text):
+        """Write one file per key (atomic rename)"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            os.replace(tmp_path, os.path.join(self.directory, key))
+        except OSError as e:
+            logger.warning(f"Could not write cache entry to {self.directory}: {e}")
+    
+    def _maybe_sweep(self, written):
+        """Every CACHE_SWEEP_INTERVAL (sooner after heavy writes), delete expired files, then the oldest over max_bytes"""
+        now = time.time()
+        with self._lock:
+            self._written += written
+            if now < self._next_sweep and self._written < self.max_bytes // 10:
+                return
+            self._next_sweep = now + CACHE_SWEEP_INTERVAL
+            self._written = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        kept, total = [], 0
+        for entry in entries:
+            try:
+                stat = entry.stat()
+                if self._expired(stat.st_mtime):
+                    os.remove(entry.path)  # Entries nobody asks for again are never read to expire
+                    continue
+            except OSError:
+                continue  # Already gone (another worker swept it)
+            kept.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(kept):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+    
+    def _read_redis(self, key):
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(self.prefix + key)
+            pipe.ttl(self.prefix + key)
+            value, ttl_left = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Redis cache read failed, treating as a miss: {e}")
+            return None, None
+        if value is None:
+            return None, None
+        # Back-date the in-memory copy so it expires together with the Redis key
+        stored_at = time.time() - (self.ttl - ttl_left) if self.ttl is not None and ttl_left >= 0 else time.time()
+        return value.decode('utf-8'), stored_at
+    
+    def _write_redis(self, key, text):
+        try:
+            self.redis.set(self.prefix + key, text.encode('utf-8'), ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Could not write cache entry to Redis: {e}")
+    
+    def stats(self):
+        """Hit/miss counters for this process"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries_in_memory": len(self._memo)}
+    
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+    
+    def _remember(self, key, text, stored_at):
+        with self._lock:
+            self._memo[key] = (text, stored_at)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+_redis_client = None
+if REDIS_URL and redis:
+    # Connects lazily; a Redis outage degrades to cache misses, never to failed requests
+    _redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=REDIS_TIMEOUT, socket_connect_timeout=REDIS_TIMEOUT)
+    logger.info("🗄️ Caching extracted text and pitches in Redis")
+elif REDIS_URL:
+    logger.warning("REDIS_URL is set but the redis package isn't installed - caching on local disk")
+
+# Extracted text per uploaded file, and finished pitches per prompt
+_extract_cache = TextCache(EXTRACT_CACHE_DIR, ttl=EXTRACT_CACHE_TTL, redis_client=_redis_client, prefix="pitchdeck:extract:")
+_pitch_cache = TextCache(PITCH_CACHE_DIR, ttl=PITCH_CACHE_TTL, redis_client=_redis_client, prefix="pitchdeck:pitch:")
+
+def _hash_stream(stream):
+    """SHA-256 of a seekable binary stream, read in chunks and left rewound"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(65536), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def extract_file_content(original_filename, stream):
+    """Extract text from an uploaded file stream, reusing earlier results for identical bytes"""
+    try:
+        filename = original_filename.lower()
+        extension = os.path.splitext(filename)[1].lstrip('.')
+        
+        # Same bytes + same extractor settings -> same text, so skip parsing entirely
+        key = f"{_hash_stream(stream)}-{extension}-{MAX_EXTRACT_CHARS}"
+        cached = _extract_cache.get(key)
+        if cached is not None:
+            logger.info(f"Extraction cache hit for: {original_filename}")
+            return cached
+        
+        # Parsing takes a while: open the OpenAI connection meanwhile so the completion skips the TLS handshake
+        start_ai_warmup()
+        logger.info(f"Extracting content from: {original_filename}")
+        text = _extract_text(filename, stream)
+        _extract_cache.put(key, text)
+        return text
             
     except Exception as e:
         logger.error(f"File extraction error: {e}")
     
     return ""
 
-def generate_pitch_content(company_name, industry, problem, solution, funding_stage, traction, context="", extracted_data=None):
-    """Generate pitch using AI with file context"""
+def _extract_text(filename, stream):
+    """Parse a file stream into text (no caching, raises on parser errors)"""
+    if filename.endswith('.pdf') and pdfium:
+        return _extract_pdf_pdfium(stream)
+        
+    elif filename.endswith('.pdf') and pymupdf:
+        return _extract_pdf_pymupdf(stream)
+        
+    elif filename.endswith('.pdf') and pypdf:
+        pdf = pypdf.PdfReader(stream)
+        parts, total = [], 0
+        for page in pdf.pages:  # Pages are parsed lazily, so breaking early skips the rest
+            if total >= MAX_EXTRACT_CHARS or len(parts) >= MAX_PDF_PAGES:
+                break
+            text = page.extract_text() or ""
+            parts.append(text)
+            total += len(text)
+        return "\n".join(parts)[:MAX_EXTRACT_CHARS]
+        
+    elif filename.endswith('.txt'):
+        # At most 4 bytes per character, so never read more than the cap needs
+        return _NONPRINTABLE_RE.sub('', _decode_text(stream.read(MAX_EXTRACT_CHARS * 4)))[:MAX_EXTRACT_CHARS]
+        
+    elif filename.endswith('.docx') and Document:
+        body = Document(stream).element.body
+        parts, total = [], 0
+        # Walk the paragraph XML lazily - doc.paragraphs wraps every paragraph up front
+        for paragraph in body.iterchildren(_DOCX_PARAGRAPH):
+            if total >= MAX_EXTRACT_CHARS:
+                break
+            text = "".join(t.text or "" for t in paragraph.iter(_DOCX_TEXT))
+            parts.append(text)
+            total += len(text)
+        return "\n".join(parts)[:MAX_EXTRACT_CHARS]
+    
+    elif filename.endswith('.doc'):
+        logger.warning(f"Legacy .doc files aren't supported, skipping: {filename}")
+    
+    return ""
+
+if Document:
+    _DOCX_PARAGRAPH, _DOCX_TEXT = qn('w:p'), qn('w:t')
+
+# Control characters that carry no meaning in a prompt (tab, newline and carriage return are kept)
+_NONPRINTABLE_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+
+_TEXT_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Charset detection guesses wildly on a few hundred bytes (Latin-1 text comes back as Arabic or Czech code
+# pages), so short or ambiguous non-UTF-8 input is read as Windows-1252, the usual legacy encoding
+DETECT_MIN_BYTES = 1024
+DETECT_MAX_CHAOS = 0.2
+LEGACY_TEXT_ENCODING = 'cp1252'
+
+def _decode_text(raw):
+    """Decode uploaded text bytes: BOM first, then UTF-8, then charset detection"""
+    for bom, encoding in _TEXT_BOMS:
+        if raw.startswith(bom):
+            # Incremental decoders tolerate a character split by the read cap
+            return codecs.getincrementaldecoder(encoding)(errors='replace').decode(raw)
+    try:
+        return codecs.getincrementaldecoder('utf-8')().decode(raw)
+    except UnicodeDecodeError:
+        pass
+    if charset_normalizer and len(raw) >= DETECT_MIN_BYTES:
+        matches = charset_normalizer.from_bytes(raw)
+        best = matches.best()
+        if best is not None and best.chaos <= DETECT_MAX_CHAOS:
+            # A near tie with Windows-1252 goes to Windows-1252
+            legacy = next((m for m in matches if m.encoding == LEGACY_TEXT_ENCODING), None)
+            if legacy is None or legacy.chaos > best.chaos + 0.05:
+                return str(best)
+    return raw.decode(LEGACY_TEXT_ENCODING, errors='replace')
+
+# Shared by all requests; threads start lazily, so nothing is spawned before gunicorn forks
+_extract_pool = ThreadPoolExecutor(max_workers=MAX_EXTRACT_THREADS, thread_name_prefix='extract')
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+_pdfium_lock = threading.Lock()  # PDFium isn't thread-safe; serialize in-process use
+_pymupdf_lock = threading.Lock()  # Neither is MuPDF
+
+def _extract_pdf_pymupdf(stream):
+    """Extract PDF text with PyMuPDF, stopping once the character cap is reached"""
+    file_content = stream.read()  # MuPDF needs the whole file in memory; uploads are capped at MAX_FILE_MB beforehand
+    with _pymupdf_lock:
+        doc = pymupdf.open(stream=file_content, filetype="pdf")
+        try:
+            parts, total = [], 0
+            for index in range(min(doc.page_count, MAX_PDF_PAGES)):
+                if total >= MAX_EXTRACT_CHARS:
+                    break
+                text = doc.load_page(index).get_text("text")
+                parts.append(text)
+                total += len(text)
+        finally:
+            doc.close()
+    return "\n".join(parts)[:MAX_EXTRACT_CHARS]
+
+def _get_pdf_pool():
+    """Create the PDF worker pool on first use (not at import, so gunicorn forks stay cheap)"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Never fork this multi-threaded worker - another thread may be inside PDFium at that moment.
+            # Workers start from a clean server process; under gunicorn they import only pdf_worker. Run as
+            # `python pitch_deck_backend.py`, multiprocessing also re-imports this script in each worker
+            # (as __mp_main__): the app is built there but never served, so it only slows worker start-up.
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(['pdf_worker'])  # Imported once by the server, inherited by each worker
+            else:
+                context = multiprocessing.get_context('spawn')
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=context)
+        return _pdf_pool
+
+def _discard_pdf_pool(pool):
+    """Drop a broken pool so the next PDF starts a fresh one"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _pdfium_in_workers(file_content, ranges):
+    """Extract page ranges on the worker processes, falling back to this process if the pool fails"""
+    pool = None
+    try:
+        pool = _get_pdf_pool()
+        return [text for chunk in pool.map(pdf_worker.page_range, ranges) for text in chunk]
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):  # A worker died (e.g. OOM-killed); this pool never recovers
+            _discard_pdf_pool(pool)
+        logger.warning(f"Parallel PDF extraction failed, retrying sequentially: {e}")
+        with _pdfium_lock:
+            return pdf_worker.page_range((file_content, ranges[0][1], ranges[-1][2], MAX_EXTRACT_CHARS))
+
+def _extract_pdf_pdfium(stream):
+    """Extract PDF text with PDFium, fanning pages out to worker processes for long files"""
+    # With workers available, don't queue behind another upload that holds PDFium in this process
+    if not _pdfium_lock.acquire(blocking=PDF_WORKERS < 2):
+        file_content = stream.read()
+        return "\n".join(_pdfium_in_workers(file_content, [(file_content, 0, MAX_PDF_PAGES, MAX_EXTRACT_CHARS)]))[:MAX_EXTRACT_CHARS]
+    try:
+        # PDFium reads the stream on demand, so short documents are never copied into memory
+        pdf = pdfium.PdfDocument(stream)
+        try:
+            page_count = min(len(pdf), MAX_PDF_PAGES)
+            if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS < 2:
+                return "\n".join(pdf_worker.pages_text(pdf, 0, page_count, MAX_EXTRACT_CHARS))[:MAX_EXTRACT_CHARS]
+        finally:
+            pdf.close()
+    finally:
+        _pdfium_lock.release()
     
-    # Determine funding amount based on stage
-    funding_amounts = {
-        "seed": "$2-3M",
-        "series-a": "$10-15M", 
-        "series-b": "$30-50M"
+    # Worker processes need the raw bytes (at most MAX_FILE_MB); one contiguous page range each so every process opens the file once
+    stream.seek(0)
+    file_content = stream.read()
+    step = -(-page_count // PDF_WORKERS)
+    ranges = [(file_content, start, min(start + step, page_count), MAX_EXTRACT_CHARS) for start in range(0, page_count, step)]
+    return "\n".join(_pdfium_in_workers(file_content, ranges))[:MAX_EXTRACT_CHARS]
+
+@functools.lru_cache(maxsize=None)
+def _token_encoding():
+    """Tokenizer for OPENAI_MODEL, loaded once (None if tiktoken or its data is unavailable)"""
+    if not tiktoken:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")  # Newer models tiktoken doesn't know yet
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, budgeting by characters: {e}")
+        return None
+
+@functools.lru_cache(maxsize=8)
+def _encode_tokens(text):
+    """Token ids for text - memoized, since routing and truncation both tokenize the same document context"""
+    return tuple(_token_encoding().encode(text, disallowed_special=()))
+
+def count_tokens(text):
+    """Number of tokens in text (estimated at ~4 chars per token without a tokenizer)"""
+    if _token_encoding() is None:
+        return len(text) // 4
+    return len(_encode_tokens(text))
+
+def truncate_tokens(text, max_tokens):
+    """Cut text to at most max_tokens tokens"""
+    # Every token covers at least one byte, so short text can't be over budget
+    if len(text.encode('utf-8')) <= max_tokens:
+        return text
+    encoding = _token_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = _encode_tokens(text)
+    if len(tokens) <= max_tokens:
+        return text
+    # The cut can land inside a multi-byte character; drop that fragment rather than emit U+FFFD
+    return encoding.decode_bytes(tokens[:max_tokens]).decode('utf-8', errors='ignore')
+
+# Pitch sections in the order the model writes them - all three come back from a single call
+PITCH_SECTIONS = ("executive_summary", "opportunity", "why_us")
+
+# Matches a fully written section value inside the (still streaming) JSON object
+_SECTION_VALUE_RE = re.compile(r'"(executive_summary|opportunity|why_us)"\s*:\s*("(?:[^"\\]|\\.)*")', re.S)
+
+# Matches the section value still being written at the end of the buffer, holding back
+# a trailing escape or high surrogate until the rest of it arrives
+_SECTION_OPEN_RE = re.compile(r'"(executive_summary|opportunity|why_us)"\s*:\s*"((?:[^"\\]|\\u(?![dD][89abAB][0-9a-fA-F]{2}\Z)[0-9a-fA-F]{4}|\\[^u])*)(?:\\u[dD][89abAB][0-9a-fA-F]{2}|\\u[0-9a-fA-F]{0,3}|\\)?\Z', re.S)
+
+# Minimum growth (in characters) before re-sending a section that is still being written
+PARTIAL_FRAME_CHARS = 64
+
+# Static instructions first, request-specific details last, so OpenAI's prompt cache can reuse the prefix
+_PITCH_SYSTEM_MESSAGE = {  # Shared, never mutated
+    "role": "system",
+    "content": "You are a top Silicon Valley pitch consultant who has helped raise over $1B in funding."
+}
+
+_PITCH_INSTRUCTIONS = """Create a compelling, professional 2-3 page sales pitch for the company described under COMPANY DETAILS below.
+
+Create a pitch with EXACTLY these 3 sections:
+
+1. EXECUTIVE SUMMARY (250-300 words)
+- What the company does
+- The problem and market opportunity
+- The solution and why it's unique
+- Current traction (use actual metrics from docs if provided)
+- Funding ask: the Funding Ask amount given below
+
+2. THE OPPORTUNITY (400-450 words)
+- Problem details with market pain points
+- Solution with specific features
+- Market size and growth
+- Business model and unit economics
+- Competitive landscape
+
+3. WHY THE COMPANY, titled with the company name in capitals (250-300 words)
+- Traction and validation
+- Team expertise
+- Use of funds
+- Path to success
+
+If document content is included below, first pull out the concrete facts it contains - revenue and growth
+(ARR, MRR), customers and other key metrics, team and founders, product features, market size (TAM/SAM/SOM),
+competitors, milestones and partnerships, financial projections and use of funds - and build the pitch on them.
+
+Use specific numbers and metrics. Be compelling and professional. Return JSON with keys: executive_summary, opportunity, why_us
+
+COMPANY DETAILS:
+"""
+
+# Instructions plus the per-request company fields; only the fields are filled in per call
+_PITCH_PROMPT_TEMPLATE = _PITCH_INSTRUCTIONS.replace('{', '{{').replace('}', '}}') + """Company: {company_name}
+Industry: {industry}
+Problem: {problem}
+Solution: {solution}
+Funding Stage: {funding_stage}
+Funding Ask: {funding_amount}
+Current Traction: {traction}
+"""
+
+_PITCH_SCHEMA_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "pitch",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {section: {"type": "string"} for section in PITCH_SECTIONS},
+            "required": list(PITCH_SECTIONS),
+            "additionalProperties": False
+        }
     }
-    funding_amount = funding_amounts.get(funding_stage, "$5M")
+}
+
+_JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+def _pitch_response_format(model):
+    """Constrain the pitch to the section schema when the model supports it, else plain JSON mode (None if neither)"""
+    if MODEL_CAPS[model]["structured_output"]:
+        return _PITCH_SCHEMA_FORMAT
+    if MODEL_CAPS[model]["json_mode"]:
+        return _JSON_OBJECT_FORMAT
+    return None
+
+def _build_pitch_messages(company_name, industry, problem, solution, funding_stage, traction, context, model):
+    """Build the chat messages for the pitch-writing call"""
+    prompt = _PITCH_PROMPT_TEMPLATE.format(
+        company_name=company_name,
+        industry=industry,
+        problem=problem,
+        solution=solution,
+        funding_stage=funding_stage,
+        funding_amount=FUNDING_AMOUNTS.get(funding_stage, DEFAULT_FUNDING_AMOUNT),
+        traction=traction if traction else 'Early stage'
+    )
+    
+    if context:
+        prompt += f"\nRAW DOCUMENT CONTENT:{truncate_tokens(context, _context_budget(model))}\n"
     
+    return [
+        _PITCH_SYSTEM_MESSAGE,
+        {"role": "user", "content": prompt}
+    ]
+
+def _context_budget(model):
+    """Document tokens sent to this model - the escalated model gets room for the documents that routed it there"""
+    return ESCALATION_CONTEXT_TOKENS if OPENAI_ESCALATION_MODEL and model == OPENAI_ESCALATION_MODEL else PITCH_CONTEXT_TOKENS
+
+def _pick_model(context):
+    """Route to the default model unless the uploaded documents overflow its context budget"""
+    if OPENAI_ESCALATION_MODEL and context:
+        context_tokens = count_tokens(context)
+        if context_tokens > PITCH_CONTEXT_TOKENS:
+            logger.info(f"Model route: {OPENAI_ESCALATION_MODEL} ({context_tokens} document tokens)")
+            return OPENAI_ESCALATION_MODEL
+    logger.info(f"Model route: {OPENAI_MODEL}")
+    return OPENAI_MODEL
+
+def _pitch_complete(result):
+    """Whether a parsed pitch has text for every section"""
+    return all(isinstance(result.get(section), str) and result[section].strip() for section in PITCH_SECTIONS)
+
+def _sampling_params(messages, model):
+    """Temperature/seed for the pitch call"""
+    if not DETERMINISTIC_PITCHES:
+        return {"temperature": 1}  # GPT-5 only supports default temperature
+    seed = int(hashlib.sha256(json_dumps(messages).encode()).hexdigest()[:8], 16)
+    return {"temperature": 1 if MODEL_CAPS[model]["reasoning"] else 0, "seed": seed}
+
+def _request_pitch_completion(messages, model, stream=False):
+    """Issue the pitch-writing chat completion (one call returns every section)"""
+    params = _sampling_params(messages, model)
+    response_format = _pitch_response_format(model)
+    if response_format:
+        params["response_format"] = response_format
+    return (chat_completion_stream if stream else chat_completion)(
+        model=model,
+        messages=messages,
+        max_completion_tokens=REASONING_MAX_TOKENS if MODEL_CAPS[model]["reasoning"] else PITCH_MAX_TOKENS,
+        **params
+    )
+
+def _finish_pitch(result, company_name, model, cached=False):
+    result['company_name'] = company_name
+    if cached:
+        result['generation_method'] = f"AI ({model}, cached)"
+    else:
+        result['generation_method'] = f"AI ({model})"
+        logger.info(f"Successfully generated pitch using {model}")
+    return result
+
+# Recent form-input embeddings as (model, scope, unit vector, cache key) for near-duplicate lookups
+_semantic_index = deque(maxlen=SEMANTIC_CACHE_SIZE)
+_semantic_lock = threading.Lock()
+
+def _embed(text):
+    """Unit-length embedding of the text, or None if the call fails"""
+    try:
+        vector = ai_client.embeddings.create(model=EMBEDDING_MODEL, input=text).data[0].embedding
+    except Exception as e:
+        logger.warning(f"Embedding failed, skipping semantic cache: {e}")
+        return None
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+def _semantic_scope(company_name, funding_stage, traction, context):
+    """Near-duplicates only count for the same company, ask, traction and documents - only the wording may differ"""
+    return hashlib.sha256(json_dumps([company_name, funding_stage, traction, context]).encode()).hexdigest()
+
+def _semantic_match(model, scope, embedding):
+    """Cache key of the most similar earlier request from this model and scope above the threshold, if any"""
+    with _semantic_lock:
+        entries = [(vector, key) for entry_model, entry_scope, vector, key in _semantic_index
+                   if entry_model == model and entry_scope == scope]
+    best_key, best_score = None, SEMANTIC_CACHE_THRESHOLD
+    for vector, key in entries:
+        score = sum(a * b for a, b in zip(vector, embedding))
+        if score >= best_score:
+            best_key, best_score = key, score
+    return best_key
+
+def _pitch_cache_key(messages, model):
+    return hashlib.sha256((model + json_dumps(messages)).encode()).hexdigest()
+
+def _parse_pitch(response):
+    """Pitch sections from a completion ({} if the reply isn't valid JSON)"""
+    try:
+        return json_loads(response.choices[0].message.content)
+    except ValueError:
+        return {}
+
+def _cached_pitch(messages, model, company_name, industry, problem, solution, funding_stage, traction, context):
+    """Look up a finished pitch for these messages: returns (key, semantic entry or None, result or None)"""
+    key = _pitch_cache_key(messages, model)
+    cached = _pitch_cache.get(key)
+    if cached is not None:
+        logger.info("Pitch cache hit (exact prompt)")
+        return key, None, json_loads(cached)
+    
+    semantic = None
+    if SEMANTIC_CACHE:
+        # Embed just the free-text form inputs; everything else must match exactly via the scope
+        embedding = _embed(f"{company_name}|{industry}|{problem}|{solution}")
+        if embedding:
+            semantic = (_semantic_scope(company_name, funding_stage, traction, context), embedding)
+            similar_key = _semantic_match(model, *semantic)
+            cached = _pitch_cache.get(similar_key) if similar_key else None
+            if cached is not None:
+                logger.info("Pitch cache hit (similar request)")
+                return key, semantic, json_loads(cached)
+    return key, semantic, None
+
+def _escalated_pitch(company_name, industry, problem, solution, funding_stage, traction, context):
+    """Pitch an earlier identical request got after escalating, if still cached"""
+    messages = _build_pitch_messages(company_name, industry, problem, solution, funding_stage, traction, context, OPENAI_ESCALATION_MODEL)
+    cached = _pitch_cache.get(_pitch_cache_key(messages, OPENAI_ESCALATION_MODEL))
+    return json_loads(cached) if cached is not None else None
+
+def _store_pitch(key, model, semantic, result):
+    _pitch_cache.put(key, json_dumps(result))
+    if semantic:
+        with _semantic_lock:
+            _semantic_index.append((model, *semantic, key))
+
+def generate_pitch_content(company_name, industry, problem, solution, funding_stage, traction, context=""):
+    """Generate pitch using AI with file context"""
     if ai_client:
         try:
-            # Build context from extracted data
-            file_context = ""
-            if extracted_data:
-                for key, value in extracted_data.items():
-                    if value:
-                        file_context += f"\n{key.replace('_', ' ').title()}: {value}"
+            model = _pick_model(context)
+            messages = _build_pitch_messages(company_name, industry, problem, solution, funding_stage, traction, context, model)
+            key, semantic, cached = _cached_pitch(
+                messages, model, company_name, industry, problem, solution, funding_stage, traction, context)
+            if cached is None and OPENAI_ESCALATION_MODEL and model != OPENAI_ESCALATION_MODEL:
+                cached = _escalated_pitch(company_name, industry, problem, solution, funding_stage, traction, context)
+                if cached is not None:
+                    model = OPENAI_ESCALATION_MODEL
+            if cached is not None:
+                return _finish_pitch(cached, company_name, model, cached=True)
             
-            prompt = f"""
-            You are a top Silicon Valley pitch consultant who has helped raise over $1B in funding.
-            Create a compelling, professional 2-3 page sales pitch.
+            result = _parse_pitch(_request_pitch_completion(messages, model))
+            if not _pitch_complete(result) and OPENAI_ESCALATION_MODEL and model != OPENAI_ESCALATION_MODEL:
+                logger.warning(f"Incomplete pitch from {model}, escalating to {OPENAI_ESCALATION_MODEL}")
+                model = OPENAI_ESCALATION_MODEL
+                messages = _build_pitch_messages(company_name, industry, problem, solution, funding_stage, traction, context, model)
+                key = _pitch_cache_key(messages, model)  # Cache under the model that actually wrote it
+                result = _parse_pitch(_request_pitch_completion(messages, model))
+            if not _pitch_complete(result):
+                raise ValueError(f"Incomplete pitch from {model}")  # Never cache or serve an empty pitch
             
-            COMPANY DETAILS:
-            Company: {company_name}
-            Industry: {industry}
-            Problem: {problem}
-            Solution: {solution}
-            Funding Stage: {funding_stage}
-            Current Traction: {traction if traction else "Early stage"}
+            _store_pitch(key, model, semantic, result)
+            return _finish_pitch(dict(result), company_name, model)
             
-            {'EXTRACTED FROM DOCUMENTS:' + file_context if file_context else ''}
-            
-            {'RAW DOCUMENT CONTENT:' + context[:2000] if context else ''}
-            
-            Create a pitch with EXACTLY these 3 sections:
-            
-            1. EXECUTIVE SUMMARY (250-300 words)
-            - What {company_name} does
-            - The problem and market opportunity
-            - The solution and why it's unique
-            - Current traction (use actual metrics from docs if provided)
-            - Funding ask: {funding_amount}
-            
-            2. THE OPPORTUNITY (400-450 words)
-            - Problem details with market pain points
-            - Solution with specific features
-            - Market size and growth
-            - Business model and unit economics
-            - Competitive landscape
-            
-            3. WHY {company_name.upper()} (250-300 words)
-            - Traction and validation
-            - Team expertise
-            - Use of funds
-            - Path to success
-            
-            Use specific numbers and metrics. Be compelling and professional.
-            
-            Return as JSON with keys: executive_summary, opportunity, why_us, company_name, generation_method
-            """
+        except Exception as e:
+            logger.error(f"AI generation failed: {e}")
+            # Fall through to template
+    
+    return fallback_pitch_content(company_name, industry, problem, solution, funding_stage, traction)
+
+def _sse(payload):
+    """Format one Server-Sent Events frame"""
+    return f"data: {json_dumps(payload)}\n\n"
+
+def stream_pitch_content(company_name, industry, problem, solution, funding_stage, traction, context=""):
+    """Yield SSE frames: growing and completed sections as they're written, then the full pitch"""
+    if ai_client:
+        emitted = set()
+        partial_sent = {}  # section -> length of the in-progress text last sent
+        try:
+            model = _pick_model(context)
+            messages = _build_pitch_messages(company_name, industry, problem, solution, funding_stage, traction, context, model)
+            key, semantic, cached = _cached_pitch(
+                messages, model, company_name, industry, problem, solution, funding_stage, traction, context)
+            if cached is None and OPENAI_ESCALATION_MODEL and model != OPENAI_ESCALATION_MODEL:
+                cached = _escalated_pitch(company_name, industry, problem, solution, funding_stage, traction, context)
+                if cached is not None:
+                    model = OPENAI_ESCALATION_MODEL
+            if cached is not None:
+                for section in PITCH_SECTIONS:
+                    if section in cached:
+                        yield _sse({"section": section, "text": cached[section]})
+                yield _sse({"done": True, "pitch": _finish_pitch(cached, company_name, model, cached=True)})
+                return
             
-            response = ai_client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are a world-class pitch expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=1,  # GPT-5 only supports default temperature
-                max_completion_tokens=3000,  # Changed from max_tokens
-                response_format={"type": "json_object"}
-            )
+            buffer = ""
+            scan_from = 0  # End of the last closed section value; nothing before it changes again
+            for chunk in _request_pitch_completion(messages, model, stream=True):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                buffer += delta
+                
+                # Forward each section the moment its JSON string value is closed
+                for match in _SECTION_VALUE_RE.finditer(buffer, scan_from):
+                    scan_from = match.end()
+                    section = match.group(1)
+                    if section not in emitted:
+                        emitted.add(section)
+                        yield _sse({"section": section, "text": json_loads(match.group(2))})
+                
+                # ...and the section being written, every few words
+                match = _SECTION_OPEN_RE.search(buffer, scan_from)
+                if match and len(match.group(2)) - partial_sent.get(match.group(1), 0) >= PARTIAL_FRAME_CHARS:
+                    try:
+                        text = json_loads(f'"{match.group(2)}"')
+                    except ValueError:  # A preview frame is never worth aborting the stream over
+                        pass
+                    else:
+                        partial_sent[match.group(1)] = len(match.group(2))
+                        yield _sse({"section": match.group(1), "text": text, "partial": True})
             
-            result = json.loads(response.choices[0].message.content)
-            result['company_name'] = company_name
-            result['generation_method'] = f"AI ({OPENAI_MODEL})"
-            logger.info(f"Successfully generated pitch using {OPENAI_MODEL}")
-            return result
+            result = json_loads(buffer)
+            if not _pitch_complete(result):
+                raise ValueError(f"Incomplete pitch from {model}")
+            _store_pitch(key, model, semantic, result)
+            yield _sse({"done": True, "pitch": _finish_pitch(dict(result), company_name, model)})
+            return
             
         except Exception as e:
-            logger.error(f"AI generation failed: {e}")
+            logger.error(f"AI streaming failed: {e}")
+            if emitted or partial_sent:
+                # The browser already shows partial AI output - don't swap in a template
+                yield _sse({"error": "Pitch generation was interrupted"})
+                return
             # Fall through to template
     
-    # Fallback template
-    logger.warning("Using fallback template - AI not available")
-    
-    return {
-        "company_name": company_name,
-        "generation_method": "Template (AI unavailable)",
-        "executive_summary": f"""
+    yield _sse({"done": True, "pitch": fallback_pitch_content(company_name, industry, problem, solution, funding_stage, traction)})
+
+# Template pitch sections, filled with str.format_map
+_FALLBACK_TEMPLATES = {
+    "executive_summary": """
 {company_name} is transforming the {industry} industry by solving {problem}. 
 Our solution - {solution} - delivers unprecedented value to enterprises.
 
-Since launch, we've achieved {traction if traction else 'strong early traction'}, 
+Since launch, we've achieved {traction_summary}, 
 demonstrating product-market fit. The {industry} market represents a multi-billion 
 dollar opportunity.
 
 We're raising {funding_amount} in {funding_stage} funding to accelerate growth 
 and capture market share.
-        """.strip(),
-        
-        "opportunity": f"""
+    """.strip(),
+    
+    "opportunity": """
 THE PROBLEM:
 {problem} is a critical challenge in {industry}. Organizations struggle with 
 inefficiency and lost revenue.
@@ -848,11 +1323,11 @@ exceeds several billion dollars.
 BUSINESS MODEL:
 We operate a scalable SaaS model with strong unit economics and growing 
 customer lifetime value.
-        """.strip(),
-        
-        "why_us": f"""
+    """.strip(),
+    
+    "why_us": """
 TRACTION:
-{traction if traction else 'Early customer validation and growing pipeline'}.
+{traction_detail}.
 
 TEAM:
 Led by experienced operators with deep {industry} expertise.
@@ -860,8 +1335,30 @@ Led by experienced operators with deep {industry} expertise.
 THE ASK:
 Raising {funding_amount} to expand product, grow sales, and scale operations.
 {company_name} is positioned to become the leader in this space.
-        """.strip()
+    """.strip()
+}
+
+def fallback_pitch_content(company_name, industry, problem, solution, funding_stage, traction):
+    """Template pitch used when the AI is unavailable or fails"""
+    logger.warning("Using fallback template - AI not available")
+    
+    values = {
+        "company_name": company_name,
+        "industry": industry,
+        "problem": problem,
+        "solution": solution,
+        "funding_stage": funding_stage,
+        "funding_amount": FUNDING_AMOUNTS.get(funding_stage, DEFAULT_FUNDING_AMOUNT),
+        "traction_summary": traction if traction else 'strong early traction',
+        "traction_detail": traction if traction else 'Early customer validation and growing pipeline'
+    }
+    pitch = {
+        "company_name": company_name,
+        "generation_method": "Template (AI unavailable)"
     }
+    for section, template in _FALLBACK_TEMPLATES.items():
+        pitch[section] = template.format_map(values)
+    return pitch
 
 if __name__ == '__main__':
     print(f"""
@@ -876,4 +1373,5 @@ if __name__ == '__main__':
     ========================================
     """)
     
-    app.run(host='0.0.0.0', port=PORT, debug=True)
\ No newline at end of file
+    # Local development only - production runs gunicorn.conf.py. Set FLASK_DEBUG=1 for the reloader and debugger
+    app.run(host='0.0.0.0', port=PORT, threaded=True)
\ No newline at end of file
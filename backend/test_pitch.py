@@ -0,0 +1,134 @@
+"""
+Tests for pitch generation: one completion per pitch, the streaming section parser and the text helpers
+Run with: cd backend && python -m pytest -q
+"""
+
+import json
+import time
+import types
+
+import pytest
+
+import pitch_deck_backend as backend
+
+PITCH = {
+    "executive_summary": "Acme makes onboarding painless for every new hire, from day one to day ninety. \U0001F600 Done.",
+    "opportunity": "Onboarding software is a large and growing market with no clear leader yet.",
+    "why_us": "We have shipped this before, and our first customers already renew.",
+}
+FORM = ("Acme", "SaaS", "Onboarding is slow", "Guided onboarding", "seed", "")
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions, replying with PITCH and recording every call"""
+
+    def __init__(self, chunks=None):
+        self.calls = []
+        self.chunks = chunks  # Streamed reply split into these deltas
+
+    def create(self, stream=False, **kwargs):
+        self.calls.append(kwargs)
+        if stream:
+            return FakeStream([_response(delta, stream=True) for delta in self.chunks])
+        return _response(json.dumps(PITCH))
+
+
+class FakeStream(list):
+    """Streamed reply; the app closes it once done"""
+
+    def close(self):
+        pass
+
+
+def _response(content, stream=False):
+    message = types.SimpleNamespace(content=content)
+    choice = types.SimpleNamespace(delta=message) if stream else types.SimpleNamespace(message=message)
+    return types.SimpleNamespace(choices=[choice])
+
+
+def _frames(body):
+    """Decode the payloads of a list of SSE frames"""
+    return [json.loads(frame[len("data: "):]) for frame in body]
+
+
+@pytest.fixture
+def completions(monkeypatch, tmp_path):
+    """Fake OpenAI client with an empty pitch cache"""
+    completions = FakeCompletions()
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    monkeypatch.setattr(backend, "ai_client", client)
+    monkeypatch.setattr(backend, "_pitch_cache", backend.TextCache(str(tmp_path), ttl=60))
+    return completions
+
+
+def test_generate_makes_one_completion_per_pitch(completions):
+    pitch = backend.generate_pitch_content(*FORM)
+    assert len(completions.calls) == 1
+    assert pitch["generation_method"] == f"AI ({backend.OPENAI_MODEL})"
+    assert all(pitch[section] == PITCH[section] for section in backend.PITCH_SECTIONS)
+
+    # Same request again comes from the pitch cache
+    backend.generate_pitch_content(*FORM)
+    assert len(completions.calls) == 1
+
+
+def test_stream_makes_one_completion_per_pitch(completions):
+    reply = json.dumps(PITCH)
+    completions.chunks = [reply[i:i + 5] for i in range(0, len(reply), 5)]
+    frames = _frames(backend.stream_pitch_content(*FORM))
+
+    assert len(completions.calls) == 1
+    assert [frame["section"] for frame in frames if "section" in frame and not frame.get("partial")] == list(backend.PITCH_SECTIONS)
+    assert frames[-1]["done"] and frames[-1]["pitch"]["executive_summary"] == PITCH["executive_summary"]
+
+
+def test_stream_survives_a_surrogate_pair_split_across_chunks(completions):
+    # json.dumps escapes the emoji as \ud83d\ude00; cut the reply between the two halves
+    reply = json.dumps(PITCH)
+    cut = reply.index("\\ude00")
+    completions.chunks = [reply[:cut], reply[cut:]]
+    frames = _frames(backend.stream_pitch_content(*FORM))
+
+    assert not any("error" in frame for frame in frames)
+    assert frames[-1]["pitch"]["executive_summary"] == PITCH["executive_summary"]
+    partial = [frame["text"] for frame in frames if frame.get("partial")]
+    assert partial and all(PITCH["executive_summary"].startswith(text) for text in partial)
+
+
+@pytest.mark.parametrize("buffer, expected", [
+    ('{"executive_summary": "Half a \\ud83d', "Half a "),
+    ('{"executive_summary": "Cut in \\u00', "Cut in "),
+    ('{"executive_summary": "Trailing \\', "Trailing "),
+    ('{"executive_summary": "Whole \\ud83d\\ude00 pair', "Whole \\ud83d\\ude00 pair"),
+])
+def test_open_section_holds_back_incomplete_escapes(buffer, expected):
+    match = backend._SECTION_OPEN_RE.search(buffer)
+    assert match.group(1) == "executive_summary"
+    assert match.group(2) == expected
+    json.loads(f'"{match.group(2)}"')  # Always decodable on its own
+
+
+def test_truncate_tokens():
+    assert backend.truncate_tokens("short text", 100) == "short text"
+
+    text = "Pitch decks need focus. " * 500
+    truncated = backend.truncate_tokens(text, 50)
+    assert text.startswith(truncated)
+    assert 0 < backend.count_tokens(truncated) <= 50
+
+    # A cut inside a multi-byte character is dropped, not replaced
+    assert "\ufffd" not in backend.truncate_tokens("日本語のテキスト" * 200, 25)
+
+
+def test_text_cache_expiry(tmp_path, monkeypatch):
+    cache = backend.TextCache(str(tmp_path), ttl=60)
+    cache.put("key", "cached text")
+    assert cache.get("key") == "cached text"
+
+    now = time.time()
+    monkeypatch.setattr(backend.time, "time", lambda: now + 61)
+    assert cache.get("key") is None
+
+    # Expired entries are deleted from disk, so a fresh cache doesn't find them either
+    assert backend.TextCache(str(tmp_path), ttl=60).get("key") is None
+    assert not (tmp_path / "key").exists()